@@ -5,7 +5,7 @@ import time
 
 from ....core.database import get_db
 from ....core.config import settings
-from ....services.vector_service import VectorService
+from ....services.vector_service import get_vector_service
 
 router = APIRouter()
 
@@ -34,7 +34,7 @@ async def readiness_check(db: Session = Depends(get_db)):
     
     # Vector database check
     try:
-        vector_service = VectorService()
+        vector_service = get_vector_service()
         collection_info = vector_service.get_collection_info()
         checks["vector_db"] = {
             "status": "healthy", 
@@ -23,7 +23,12 @@ class Settings(BaseSettings):
     # Vector Database Settings (Qdrant)
     qdrant_host: str = "localhost"
     qdrant_port: int = 6333
+    qdrant_grpc_port: int = 6334
+    qdrant_prefer_grpc: bool = True
     qdrant_collection_name: str = "documents"
+    qdrant_upsert_batch_size: int = 64
+    qdrant_upsert_concurrency: int = 8
+    qdrant_quantization: str = "scalar"  # scalar, binary or none
     
     # Redis Settings
     redis_host: str = "localhost"
@@ -58,6 +63,12 @@ class Settings(BaseSettings):
     # Embedding Settings
     embedding_model: str = "all-MiniLM-L6-v2"
     embedding_dimension: int = 384
+    embedding_device: Optional[str] = None  # None = auto (cuda if available, else cpu)
+    embed_batch_size: int = 64
+    # CPU intra-op threads for encoding; None leaves torch's global threadpool alone
+    embedding_num_threads: Optional[int] = None
+    # SQLite file caching chunk embeddings across re-ingestion; None disables it
+    embedding_cache_path: Optional[str] = None
     
     # RAG Settings
     max_context_chunks: int = 5
@@ -1,12 +1,15 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import httpx
 import logging
 import asyncio
+import time
 
 from .core.config import settings
 from .core.init_db import init_database
 from .api.v1.router import api_router
+from .schemas.dev import BatchRequest
 
 # Configure logging
 logging.basicConfig(
@@ -26,10 +29,10 @@ async def lifespan(app: FastAPI):
         logger.info("Initializing database...")
         init_database()
         
-        # Test vector service connection
+        # Load the shared vector service and warm up encoder + Qdrant connection
         logger.info("Testing vector service connection...")
-        from .services.vector_service import VectorService
-        vector_service = VectorService()
+        from .services.vector_service import get_vector_service
+        get_vector_service().warmup()
         logger.info("✅ Vector service connected successfully!")
         
         logger.info("✅ Backend startup completed successfully!")
@@ -123,6 +126,34 @@ async def list_routes():
         "routes": sorted(routes, key=lambda x: x["path"])
     }
 
+async def _batch_get(client: httpx.AsyncClient, path: str) -> dict:
+    """Run one batched GET and describe its response"""
+    start_time = time.perf_counter()
+    response = await client.get(path)
+    item = {
+        "status": response.status_code,
+        "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 2)
+    }
+    try:
+        item["json"] = response.json()
+    except ValueError:
+        item["text"] = response.text[:200]
+    return item
+
+@app.post("/api/v1/dev/batch")
+async def batch_requests(batch: BatchRequest):
+    """Development helper - run several GET requests in one round-trip"""
+    if not settings.debug:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if any(probe.method.upper() != "GET" for probe in batch.requests):
+        raise HTTPException(status_code=400, detail="Only GET requests can be batched")
+    
+    # Dispatch in-process through the ASGI app, all sub-requests at once.
+    # A failing sub-endpoint becomes a 500 item instead of failing the whole batch.
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://batch") as client:
+        return await asyncio.gather(*(_batch_get(client, probe.path) for probe in batch.requests))
+
 @app.get("/api/v1/system/status")
 async def system_status():
     """System status overview"""
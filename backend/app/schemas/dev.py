@@ -0,0 +1,12 @@
+# File: backend/app/schemas/dev.py
+from pydantic import BaseModel, Field
+from typing import List
+
+class BatchProbe(BaseModel):
+    """Single sub-request of a dev batch"""
+    method: str = Field("GET", description="HTTP method (only GET can be batched)")
+    path: str = Field(..., description="Request path, e.g. /ping")
+
+class BatchRequest(BaseModel):
+    """Several GET requests answered in one round-trip"""
+    requests: List[BatchProbe]
@@ -1,11 +1,12 @@
 from .document_service import DocumentService
 from .search_service import SearchService
 from .text_processor import TextProcessor
-from .vector_service import VectorService
+from .vector_service import VectorService, get_vector_service
 
 __all__ = [
     "DocumentService",
     "SearchService", 
     "TextProcessor",
-    "VectorService"
+    "VectorService",
+    "get_vector_service"
 ]
\ No newline at end of file
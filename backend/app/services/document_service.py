@@ -14,7 +14,8 @@ from ..models.collection import Collection
 from ..schemas.document import DocumentResponse, DocumentListResponse
 from ..core.config import settings
 from .text_processor import TextProcessor
-from .vector_service import VectorService
+from .vector_service import get_vector_service
+from .search_service import invalidate_document_meta
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +23,7 @@ class DocumentService:
     def __init__(self, db: Session):
         self.db = db
         self.text_processor = TextProcessor()
-        self.vector_service = VectorService()
+        self.vector_service = get_vector_service()
     
     async def upload_document(
         self, 
@@ -86,13 +87,14 @@ class DocumentService:
             
             # Create chunks
             logger.info("Creating text chunks...")
-            chunks = self.text_processor.chunk_text(content)
+            spans = self.text_processor.chunk_spans(content)
+            chunks = [content[start:end] for start, end in spans]
             logger.info(f"Created {len(chunks)} chunks")
             
-            # Generate embeddings and store in vector DB
+            # Generate embeddings and store in vector DB (payload keeps offsets into content)
             logger.info("Generating embeddings and storing in vector DB...")
             vector_ids = await self.vector_service.add_document_chunks(
-                str(document.id), chunks
+                str(document.id), chunks, spans
             )
             logger.info(f"Stored {len(vector_ids)} vectors")
             
@@ -158,6 +160,7 @@ class DocumentService:
             # Delete from database
             self.db.delete(document)
             self.db.commit()
+            invalidate_document_meta(document.id)
             
             logger.info(f"Document deleted: {document.filename} (ID: {document.id})")
             return True
@@ -0,0 +1,77 @@
+# File: backend/app/services/embedding_cache.py
+from typing import Dict, List, Optional
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class EmbeddingCache:
+    """SQLite-backed cache of chunk embeddings, keyed by model and chunk text hash"""
+
+    def __init__(self, path: str, model_name: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.model_name = model_name
+        # Encoding runs in executor threads, so share one connection behind a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+        logger.info(f"Embedding cache at {path}")
+
+    def _key(self, text: str) -> bytes:
+        """16-byte digest of model name and chunk text"""
+        digest = hashlib.blake2b(self.model_name.encode(), digest_size=16)
+        digest.update(b"\0")
+        digest.update(text.encode())
+        return digest.digest()
+
+    def get_many(self, texts: List[str]) -> Dict[int, np.ndarray]:
+        """Return {index: vector} for the texts that are cached"""
+        keys = [self._key(text) for text in texts]
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                found.update(rows)
+
+        return {
+            i: np.frombuffer(found[key], dtype=np.float16).astype(np.float32)
+            for i, key in enumerate(keys) if key in found
+        }
+
+    def put_many(self, texts: List[str], vectors: np.ndarray):
+        """Store vectors (as fp16) for the given texts"""
+        rows = [
+            (self._key(text), vector.astype(np.float16).tobytes())
+            for text, vector in zip(texts, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows
+            )
+            self._conn.commit()
+
+def open_embedding_cache(path: Optional[str], model_name: str) -> Optional[EmbeddingCache]:
+    """Open the embedding cache, or return None when it is disabled or unusable"""
+    if not path:
+        return None
+    try:
+        return EmbeddingCache(path, model_name)
+    except Exception as e:
+        logger.warning(f"Embedding cache disabled ({e})")
+        return None
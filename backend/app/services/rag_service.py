@@ -4,7 +4,7 @@ import logging
 from sqlalchemy.orm import Session
 
 from .llm_service import LLMService, LLMProvider
-from .vector_service import VectorService
+from .vector_service import get_vector_service
 from .search_service import SearchService
 from ..schemas.chat import ChatRequest, ChatResponse, SearchResult
 
@@ -16,7 +16,7 @@ class RAGService:
     def __init__(self, db: Session):
         self.db = db
         self.llm_service = LLMService()
-        self.vector_service = VectorService()
+        self.vector_service = get_vector_service()
         self.search_service = SearchService(db)
         
         # RAG Configuration
@@ -1,20 +1,58 @@
 # File: backend/app/services/search_service.py
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any, Optional
+from sqlalchemy import func, literal, select, union_all
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from cachetools import LRUCache
+import ahocorasick
+import asyncio
 import time
 import logging
 import re
+import threading
+import uuid
 
 from ..schemas.search import SearchRequest, SearchResponse, SearchResult
 from ..models.document import Document
-from .vector_service import VectorService
+from .vector_service import get_vector_service
 
 logger = logging.getLogger(__name__)
 
+_URL_RE = re.compile(r'https?://[^\s]+')
+_HEX_ID_RE = re.compile(r'[a-f0-9]{32,}')
+
+# filename/content_type never change after upload, so cache them by document id.
+# cachetools caches are not thread-safe and these are used from executor threads.
+_DOC_META_CACHE: LRUCache = LRUCache(maxsize=10_000)
+_DOC_META_LOCK = threading.Lock()
+
+# Lowercased document content, keyed by (id, updated_at) so edits invalidate it.
+# Bounded by total characters (not entries), since documents can be large.
+_CONTENT_LOWER_CACHE: LRUCache = LRUCache(maxsize=16_000_000, getsizeof=len)
+_CONTENT_LOWER_LOCK = threading.Lock()
+
+def _lowered_content(doc: Document) -> str:
+    """Return doc.content.lower(), computed once per document version"""
+    if not doc.content:
+        return ""
+    key = (str(doc.id), doc.updated_at)
+    with _CONTENT_LOWER_LOCK:
+        content_lower = _CONTENT_LOWER_CACHE.get(key)
+    if content_lower is None:
+        content_lower = doc.content.lower()
+        if len(content_lower) <= _CONTENT_LOWER_CACHE.maxsize:
+            with _CONTENT_LOWER_LOCK:
+                _CONTENT_LOWER_CACHE[key] = content_lower
+    return content_lower
+
+def invalidate_document_meta(document_id: str):
+    """Drop cached document metadata (call when a document is deleted)"""
+    with _DOC_META_LOCK:
+        _DOC_META_CACHE.pop(str(document_id), None)
+
 class SearchService:
     def __init__(self, db: Session):
         self.db = db
-        self.vector_service = VectorService()
+        self.vector_service = get_vector_service()
     
     async def semantic_search(self, request: SearchRequest) -> SearchResponse:
         """Perform semantic search using vector embeddings"""
@@ -23,36 +61,43 @@ class SearchService:
         try:
             logger.info(f"Performing semantic search for: '{request.query}' (top_k={request.top_k})")
             
-            # Perform vector search
+            # Perform vector search (a few best chunks per document, grouped by Qdrant)
             vector_results = await self.vector_service.search(
                 query=request.query,
                 top_k=request.top_k * 2,  # Get more results for filtering
                 document_ids=request.document_ids,
-                score_threshold=max(request.score_threshold, 0.1)  # Minimum threshold
+                score_threshold=max(request.score_threshold, 0.1),  # Minimum threshold
+                group_by_document=True
             )
             
-            # Get document information and deduplicate
+            # Get document information (blocking ORM call, so run it in executor)
+            loop = asyncio.get_event_loop()
+            doc_meta = await loop.run_in_executor(
+                None, self._get_document_meta, {r["document_id"] for r in vector_results}
+            )
+            # Points that only store offsets get their text sliced out of Postgres
+            await loop.run_in_executor(None, self._fill_chunk_texts, vector_results)
+            is_relevant = self._make_relevance_filter(request.query)
             results = []
             seen_documents = set()
             
             for result in vector_results:
                 doc_id = result["document_id"]
                 
-                # Skip if we already have this document (deduplicate)
+                # Keep the best chunk of each document that passes the filter
                 if doc_id in seen_documents:
                     continue
                 
                 # Get document info
-                document = self.db.query(Document).filter(Document.id == doc_id).first()
-                if not document:
+                meta = doc_meta.get(doc_id)
+                if not meta:
                     continue
+                filename, content_type = meta
                 
                 # Filter out low-quality matches
-                if not self._is_relevant_content(result["text"], request.query):
+                if not is_relevant(result["text"]):
                     continue
                 
-                seen_documents.add(doc_id)
-                
                 # Create enhanced result
                 enhanced_result = SearchResult(
                     id=result["id"],
@@ -62,11 +107,12 @@ class SearchService:
                     chunk_index=result["chunk_index"],
                     timestamp=result.get("timestamp"),
                     embedding_model=result.get("embedding_model"),
-                    document_filename=document.filename,  # Add filename
-                    document_type=document.content_type   # Add file type
+                    document_filename=filename,  # Add filename
+                    document_type=content_type   # Add file type
                 )
                 
                 results.append(enhanced_result)
+                seen_documents.add(doc_id)
                 
                 # Stop when we have enough unique results
                 if len(results) >= request.top_k:
@@ -90,31 +136,83 @@ class SearchService:
             logger.error(f"Error in semantic search: {e}")
             raise
     
-    def _is_relevant_content(self, text: str, query: str) -> bool:
-        """Check if the text content is relevant to the query"""
-        # Skip very short fragments
-        if len(text.strip()) < 20:
-            return False
+    def _get_document_meta(self, doc_ids) -> Dict[str, Tuple[str, str]]:
+        """Get (filename, content_type) for documents, querying only uncached ids"""
+        with _DOC_META_LOCK:
+            meta = {doc_id: _DOC_META_CACHE[doc_id] for doc_id in doc_ids if doc_id in _DOC_META_CACHE}
         
-        # Skip fragments that are mostly URLs
-        url_pattern = r'https?://[^\s]+'
-        urls = re.findall(url_pattern, text)
-        if len(''.join(urls)) > len(text) * 0.7:  # More than 70% URLs
-            return False
+        missing = [doc_id for doc_id in doc_ids if doc_id not in meta]
+        if missing:
+            rows = self.db.query(
+                Document.id, Document.filename, Document.content_type
+            ).filter(Document.id.in_(missing)).all()
+            fetched = {str(row.id): (row.filename, row.content_type) for row in rows}
+            with _DOC_META_LOCK:
+                _DOC_META_CACHE.update(fetched)
+            # Answer from the query itself, so a concurrent eviction can't drop an entry
+            meta.update(fetched)
         
-        # Skip fragments that are mostly random characters/IDs
-        if len(re.findall(r'[a-f0-9]{32,}', text)) > 2:  # Multiple long hex strings
-            return False
+        return meta
+    
+    def _fill_chunk_texts(self, vector_results: List[Dict[str, Any]]):
+        """Fill in text for offset-only hits with a single substring query"""
+        pending = [r for r in vector_results if r.get("text") is None and r.get("offset") is not None]
+        if not pending:
+            return
         
-        # Check for query terms in content (case insensitive)
-        query_words = query.lower().split()
-        text_lower = text.lower()
+        queries = []
+        for i, r in enumerate(pending):
+            try:
+                doc_id = uuid.UUID(r["document_id"])
+            except (ValueError, TypeError):
+                continue  # cannot match any document
+            queries.append(
+                select(
+                    literal(i).label("i"),
+                    func.substr(Document.content, r["offset"] + 1, r["length"]).label("text")
+                ).where(Document.id == doc_id)
+            )
+        if queries:
+            rows = self.db.execute(union_all(*queries) if len(queries) > 1 else queries[0]).all()
+            for row in rows:
+                pending[row.i]["text"] = row.text
         
+        # Hits whose document is gone (or has no content) just render empty
+        for r in pending:
+            if r["text"] is None:
+                r["text"] = ""
+    
+    def _make_relevance_filter(self, query: str) -> Callable[[str], bool]:
+        """Build a relevance check for one query (query-dependent work is done once)"""
+        query_words = query.lower().split()
         # At least one query word should be present for very short queries
-        if len(query_words) <= 2:
-            return any(word in text_lower for word in query_words if len(word) > 2)
+        required_words = (
+            tuple(word for word in query_words if len(word) > 2)
+            if len(query_words) <= 2 else None
+        )
         
-        return True
+        def is_relevant(text: str) -> bool:
+            # Skip very short fragments
+            if len(text.strip()) < 20:
+                return False
+            
+            # Skip fragments that are mostly URLs
+            urls = _URL_RE.findall(text)
+            if len(''.join(urls)) > len(text) * 0.7:  # More than 70% URLs
+                return False
+            
+            # Skip fragments that are mostly random characters/IDs
+            if len(_HEX_ID_RE.findall(text)) > 2:  # Multiple long hex strings
+                return False
+            
+            # Check for query terms in content (case insensitive)
+            if required_words is not None:
+                text_lower = text.lower()
+                return any(word in text_lower for word in required_words)
+            
+            return True
+        
+        return is_relevant
     
     def _clean_and_highlight_text(self, text: str, query: str) -> str:
         """Clean and potentially highlight relevant parts of text"""
@@ -144,6 +242,7 @@ class SearchService:
         try:
             # Search in document content using database
             query_terms = request.query.lower().split()
+            matcher = self._build_term_matcher(query_terms)
             
             # Build SQL query for keyword search
             documents = self.db.query(Document).filter(
@@ -157,20 +256,18 @@ class SearchService:
             
             results = []
             for doc in documents.limit(request.top_k * 2):  # Get more for filtering
-                content = doc.content.lower() if doc.content else ""
+                content = _lowered_content(doc)
                 
-                # Check if any query terms are in content
-                matches = []
-                for term in query_terms:
-                    if len(term) > 2 and term in content:
-                        matches.append(term)
+                # Find all query terms in content with a single pass
+                found = self._find_terms(matcher, content)
+                matches = [term for term in query_terms if term in found]
                 
                 if matches:
                     # Calculate simple relevance score
                     score = len(matches) / len(query_terms)
                     
                     # Find best excerpt
-                    excerpt = self._find_best_excerpt(doc.content, request.query)
+                    excerpt = self._find_best_excerpt(doc.content, request.query, content_lower=content)
                     
                     result = SearchResult(
                         id=f"keyword_{doc.id}",
@@ -202,13 +299,44 @@ class SearchService:
             logger.error(f"Error in keyword search: {e}")
             raise
     
-    def _find_best_excerpt(self, content: str, query: str, excerpt_length: int = 300) -> str:
+    def _build_term_matcher(self, query_terms: List[str]) -> Optional[ahocorasick.Automaton]:
+        """Build an Aho-Corasick automaton over the searchable query terms"""
+        terms = {term for term in query_terms if len(term) > 2}
+        if not terms:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for term in terms:
+            automaton.add_word(term, term)
+        automaton.make_automaton()
+        return automaton
+    
+    def _find_terms(self, matcher: Optional[ahocorasick.Automaton], content: str) -> set:
+        """Return the set of matcher terms occurring in content"""
+        found = set()
+        if matcher is None or not content:
+            return found
+        
+        for _, term in matcher.iter(content):
+            found.add(term)
+            if len(found) == len(matcher):  # every term seen, stop scanning
+                break
+        return found
+    
+    def _find_best_excerpt(
+        self, 
+        content: str, 
+        query: str, 
+        excerpt_length: int = 300,
+        content_lower: Optional[str] = None
+    ) -> str:
         """Find the best excerpt from content that matches the query"""
         if not content:
             return ""
         
         query_words = [word.lower() for word in query.split() if len(word) > 2]
-        content_lower = content.lower()
+        if content_lower is None:
+            content_lower = content.lower()
         
         best_start = 0
         best_score = 0
@@ -250,7 +378,7 @@ class SearchService:
             for doc in documents:
                 if doc.content:
                     # Extract words that start with the partial query
-                    words = re.findall(r'\b\w+', doc.content.lower())
+                    words = re.findall(r'\b\w+', _lowered_content(doc))
                     for word in words:
                         if (word.startswith(partial_lower) and 
                             len(word) > len(partial_lower) and 
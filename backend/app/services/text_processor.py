@@ -2,8 +2,9 @@ import PyPDF2
 import docx
 import markdown
 from bs4 import BeautifulSoup
+from html.parser import HTMLParser
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
 import logging
 import aiofiles
 
@@ -11,6 +12,44 @@ from ..core.config import settings
 
 logger = logging.getLogger(__name__)
 
+READ_BLOCK_SIZE = 64 * 1024
+
+class _HTMLTextExtractor(HTMLParser):
+    """Incremental HTML-to-text parser (skips script/style content like BeautifulSoup.get_text)"""
+    
+    _SKIPPED_TAGS = {"script", "style", "template"}
+    # Block boundaries become line breaks, so "<p>a</p><p>b</p>" doesn't run together
+    _BLOCK_TAGS = {
+        "address", "article", "aside", "blockquote", "br", "dd", "div", "dl", "dt",
+        "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+        "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table",
+        "tr", "ul"
+    }
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._parts: List[str] = []
+        self._skip_depth = 0
+    
+    def handle_starttag(self, tag, attrs):
+        if tag in self._SKIPPED_TAGS:
+            self._skip_depth += 1
+        elif tag in self._BLOCK_TAGS and not self._skip_depth:
+            self._parts.append("\n")
+    
+    def handle_endtag(self, tag):
+        if tag in self._SKIPPED_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag in self._BLOCK_TAGS and not self._skip_depth:
+            self._parts.append("\n")
+    
+    def handle_data(self, data):
+        if not self._skip_depth:
+            self._parts.append(data)
+    
+    def get_text(self) -> str:
+        return "".join(self._parts)
+
 class TextProcessor:
     
     async def extract_text(self, file_path: str) -> str:
@@ -34,20 +73,25 @@ class TextProcessor:
     
     def chunk_text(self, text: str, chunk_size: int = None, overlap: int = None) -> List[str]:
         """Split text into chunks with overlap"""
+        return [text[start:end] for start, end in self.chunk_spans(text, chunk_size, overlap)]
+    
+    def chunk_spans(self, text: str, chunk_size: int = None, overlap: int = None) -> List[Tuple[int, int]]:
+        """Split text into overlapping chunks, returned as (start, end) offsets into text"""
         chunk_size = chunk_size or settings.chunk_size
         overlap = overlap or settings.chunk_overlap
         
-        if len(text) <= chunk_size:
-            return [text]
+        text_length = len(text)
+        if text_length <= chunk_size:
+            return [(0, text_length)]
         
-        chunks = []
+        spans = []
         start = 0
         
-        while start < len(text):
+        while start < text_length:
             end = start + chunk_size
             
             # Try to break at sentence or word boundary
-            if end < len(text):
+            if end < text_length:
                 # Look for sentence ending
                 sentence_end = text.rfind('.', start, end)
                 if sentence_end > start + chunk_size // 2:
@@ -58,13 +102,18 @@ class TextProcessor:
                     if word_end > start + chunk_size // 2:
                         end = word_end
             
-            chunk = text[start:end].strip()
-            if chunk:
-                chunks.append(chunk)
+            # Trim surrounding whitespace by index
+            chunk_start, chunk_end = start, min(end, text_length)
+            while chunk_start < chunk_end and text[chunk_start].isspace():
+                chunk_start += 1
+            while chunk_end > chunk_start and text[chunk_end - 1].isspace():
+                chunk_end -= 1
+            if chunk_start < chunk_end:
+                spans.append((chunk_start, chunk_end))
             
             start = end - overlap
         
-        return chunks
+        return spans
     
     # Private extraction methods
     
@@ -105,11 +154,14 @@ class TextProcessor:
     
     async def _extract_from_html(self, file_path: Path) -> str:
         """Extract text from HTML file"""
+        # Feed the parser block by block instead of loading the file and a full DOM
+        parser = _HTMLTextExtractor()
         async with aiofiles.open(file_path, 'r', encoding='utf-8') as file:
-            content = await file.read()
+            while block := await file.read(READ_BLOCK_SIZE):
+                parser.feed(block)
+        parser.close()
         
-        soup = BeautifulSoup(content, 'html.parser')
-        text = soup.get_text()
+        text = parser.get_text()
         
         # Clean up extra whitespace
         lines = [line.strip() for line in text.splitlines()]
@@ -1,27 +1,62 @@
 # File: backend/app/services/vector_service.py
-from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, MatchValue
+from qdrant_client import QdrantClient, AsyncQdrantClient
+from qdrant_client.models import (
+    Distance, VectorParams, Batch, Filter, FieldCondition, MatchValue, MatchAny,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    BinaryQuantization, BinaryQuantizationConfig,
+    SearchParams, QuantizationSearchParams, PayloadSchemaType
+)
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
+from functools import lru_cache
+from cachetools import LRUCache
+import hashlib
 import uuid
 import logging
 import asyncio
+import numpy as np
+import torch
 
 from ..core.config import settings
+from .embedding_cache import open_embedding_cache
 
 logger = logging.getLogger(__name__)
 
 class VectorService:
     def __init__(self):
+        # gRPC ships vectors as packed floats instead of JSON numbers
         self.client = QdrantClient(
             host=settings.qdrant_host,
-            port=settings.qdrant_port
+            port=settings.qdrant_port,
+            grpc_port=settings.qdrant_grpc_port,
+            prefer_grpc=settings.qdrant_prefer_grpc
         )
-        self.encoder = SentenceTransformer(settings.embedding_model)
+        self.aclient = AsyncQdrantClient(
+            host=settings.qdrant_host,
+            port=settings.qdrant_port,
+            grpc_port=settings.qdrant_grpc_port,
+            prefer_grpc=settings.qdrant_prefer_grpc
+        )
+        self.encoder = self._load_encoder()
+        self._query_cache: LRUCache = LRUCache(maxsize=4096)
+        self._chunk_cache = open_embedding_cache(settings.embedding_cache_path, settings.embedding_model)
         self.collection_name = "documents"
         self._ensure_collection()
     
+    def _load_encoder(self) -> SentenceTransformer:
+        """Load the embedding model, in half precision when running on a GPU"""
+        device = settings.embedding_device or ("cuda" if torch.cuda.is_available() else "cpu")
+        if settings.embedding_num_threads and device == "cpu":
+            torch.set_num_threads(settings.embedding_num_threads)
+            logger.info(f"Using {settings.embedding_num_threads} torch threads for encoding")
+        
+        encoder = SentenceTransformer(settings.embedding_model, device=device)
+        if device.startswith("cuda"):
+            encoder.half()
+        logger.info(f"Loaded embedding model {settings.embedding_model} on {device}")
+        return encoder
+    
     def _ensure_collection(self):
         """Create collection if it doesn't exist"""
         try:
@@ -32,84 +67,224 @@ class VectorService:
                     collection_name=self.collection_name,
                     vectors_config=VectorParams(
                         size=384,  # all-MiniLM-L6-v2 dimension
-                        distance=Distance.COSINE
-                    )
+                        distance=Distance.DOT  # vectors are L2-normalized at encode time
+                    ),
+                    quantization_config=self._quantization_config()
                 )
                 logger.info(f"Collection {self.collection_name} created successfully")
             else:
                 logger.info(f"Collection {self.collection_name} already exists")
+                self._check_distance()
+            
+            # Keyword index lets filtered searches use Qdrant's filterable HNSW;
+            # idempotent, so collections created before the index get it too
+            self.client.create_payload_index(
+                collection_name=self.collection_name,
+                field_name="document_id",
+                field_schema=PayloadSchemaType.KEYWORD
+            )
         except Exception as e:
             logger.error(f"Error creating Qdrant collection: {e}")
             raise
     
-    async def add_document_chunks(self, document_id: str, chunks: List[str]) -> List[str]:
-        """Add document chunks to vector store and return point IDs"""
+    def _quantization_config(self):
+        """Quantization for new collections, selected by settings.qdrant_quantization"""
+        if settings.qdrant_quantization == "scalar":
+            # Keep int8 copies of the vectors in RAM for a faster candidate scan
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(
+                    type=ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True
+                )
+            )
+        if settings.qdrant_quantization == "binary":
+            # 1 bit per dimension: candidate scan is XOR + popcount
+            return BinaryQuantization(
+                binary=BinaryQuantizationConfig(always_ram=True)
+            )
+        return None
+    
+    def _search_params(self) -> Optional[SearchParams]:
+        """Rescore an oversampled quantized candidate set with the original vectors"""
+        oversampling = {"scalar": 2.0, "binary": 3.0}.get(settings.qdrant_quantization)
+        if oversampling is None:
+            return None
+        return SearchParams(
+            quantization=QuantizationSearchParams(rescore=True, oversampling=oversampling)
+        )
+    
+    def _check_distance(self):
+        """Warn when an existing collection predates the switch to DOT distance"""
+        vectors_config = self.client.get_collection(self.collection_name).config.params.vectors
+        distance = getattr(vectors_config, "distance", None)
+        if distance is not None and distance != Distance.DOT:
+            logger.warning(
+                f"Collection {self.collection_name} uses {distance} distance; results are "
+                f"equivalent for normalized vectors, but recreating it with DOT avoids "
+                f"per-comparison normalization"
+            )
+    
+    def warmup(self):
+        """Run a first encode and Qdrant request so real requests don't pay the cold start"""
+        self._encode(["warmup"])
+        self.client.get_collections()
+    
+    def _encode(self, texts):
+        """Encode text(s) into L2-normalized embeddings"""
+        # encode() already sorts inputs by length before batching and restores the
+        # original order afterwards, so batches carry minimal padding;
+        # inference_mode also drops the autograd bookkeeping no_grad still does
+        with torch.inference_mode():
+            return self.encoder.encode(
+                texts,
+                batch_size=settings.embed_batch_size,
+                show_progress_bar=False,
+                normalize_embeddings=True,
+                convert_to_numpy=True
+            )
+    
+    def _encode_chunks(self, chunks: List[str]):
+        """Encode document chunks, reusing cached vectors for unchanged chunks"""
+        if self._chunk_cache is None:
+            return self._encode(chunks)
+        
+        cached = self._chunk_cache.get_many(chunks)
+        misses = [i for i in range(len(chunks)) if i not in cached]
+        logger.info(f"Embedding cache: {len(cached)} hits, {len(misses)} misses")
+        
+        vectors = np.empty((len(chunks), settings.embedding_dimension), dtype=np.float32)
+        for i, vector in cached.items():
+            vectors[i] = vector
+        if misses:
+            miss_texts = [chunks[i] for i in misses]
+            encoded = self._encode(miss_texts)
+            vectors[misses] = encoded
+            self._chunk_cache.put_many(miss_texts, encoded)
+        return vectors
+    
+    async def _embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing the vector for repeated queries"""
+        key = (settings.embedding_model, query)
+        query_vector = self._query_cache.get(key)
+        if query_vector is None:
+            loop = asyncio.get_event_loop()
+            query_vector = (await loop.run_in_executor(None, self._encode, query)).tolist()
+            self._query_cache[key] = query_vector
+        return query_vector
+    
+    async def add_document_chunks(
+        self, 
+        document_id: str, 
+        chunks: List[str],
+        spans: Optional[List[Tuple[int, int]]] = None
+    ) -> List[str]:
+        """Add document chunks to vector store and return point IDs
+        
+        When spans ((start, end) offsets of each chunk in the stored document
+        content) are given, the payload keeps only the offsets instead of the text.
+        """
         logger.info(f"Adding {len(chunks)} chunks for document {document_id}")
         
-        points = []
-        point_ids = []
+        # Embed all chunks in one batched encoder call (CPU intensive, so run it in executor)
+        loop = asyncio.get_event_loop()
+        vectors = await loop.run_in_executor(None, self._encode_chunks, chunks)
         
-        # Process chunks in batches to avoid memory issues
-        batch_size = 10
-        for i in range(0, len(chunks), batch_size):
-            batch_chunks = chunks[i:i + batch_size]
-            batch_points = []
-            batch_ids = []
-            
-            for j, chunk in enumerate(batch_chunks):
-                # Generate unique point ID
-                point_id = str(uuid.uuid4())
-                
-                # Generate embedding (this is CPU intensive, so we run it in executor)
-                loop = asyncio.get_event_loop()
-                vector = await loop.run_in_executor(None, self.encoder.encode, chunk)
-                
-                # Create point with metadata
-                batch_points.append(PointStruct(
-                    id=point_id,
-                    vector=vector.tolist(),
-                    payload={
-                        "document_id": document_id,
-                        "chunk_index": i + j,
-                        "text": chunk,
-                        "timestamp": datetime.utcnow().isoformat(),
-                        "embedding_model": settings.embedding_model
-                    }
-                ))
-                batch_ids.append(point_id)
-            
-            # Insert batch to Qdrant
-            try:
-                self.client.upsert(
+        # Shared by every point of this document
+        timestamp = datetime.utcnow().isoformat()
+        embedding_model = settings.embedding_model
+        
+        # Columnar batches (ids / vectors / payloads), no model object per point
+        ids = [self._point_id(document_id, i, chunk) for i, chunk in enumerate(chunks)]
+        vector_lists = vectors.tolist()
+        payloads = [
+            self._chunk_payload(document_id, i, chunk, spans, timestamp, embedding_model)
+            for i, chunk in enumerate(chunks)
+        ]
+        
+        # Upsert batches concurrently, with a bounded number of requests in flight
+        batch_size = settings.qdrant_upsert_batch_size
+        batches = [
+            Batch(
+                ids=ids[i:i + batch_size],
+                vectors=vector_lists[i:i + batch_size],
+                payloads=payloads[i:i + batch_size]
+            )
+            for i in range(0, len(ids), batch_size)
+        ]
+        semaphore = asyncio.Semaphore(settings.qdrant_upsert_concurrency)
+        
+        async def upsert_batch(batch_number: int, batch: Batch):
+            async with semaphore:
+                await self.aclient.upsert(
                     collection_name=self.collection_name,
-                    points=batch_points,
+                    points=batch,
                     wait=True  # Wait for operation to complete
                 )
-                logger.info(f"Successfully added batch {i//batch_size + 1} ({len(batch_points)} vectors)")
-                points.extend(batch_points)
-                point_ids.extend(batch_ids)
-                
-            except Exception as e:
-                logger.error(f"Error adding batch to Qdrant: {e}")
-                raise
-        
-        logger.info(f"Successfully added all {len(points)} vectors to Qdrant")
-        return point_ids
+            logger.info(f"Successfully added batch {batch_number} ({len(batch.ids)} vectors)")
+        
+        try:
+            await asyncio.gather(*(
+                upsert_batch(batch_number, batch)
+                for batch_number, batch in enumerate(batches, start=1)
+            ))
+        except Exception as e:
+            logger.error(f"Error adding batch to Qdrant: {e}")
+            raise
+        
+        logger.info(f"Successfully added all {len(ids)} vectors to Qdrant")
+        return ids
+    
+    @staticmethod
+    def _point_id(document_id: str, chunk_index: int, chunk: str) -> str:
+        """Content-addressed point id, so re-upserting the same chunk overwrites its point"""
+        digest = hashlib.blake2b(f"{document_id}:{chunk_index}:{chunk}".encode(), digest_size=16)
+        return str(uuid.UUID(bytes=digest.digest()))
+    
+    @staticmethod
+    def _chunk_payload(
+        document_id: str,
+        chunk_index: int,
+        chunk: str,
+        spans: Optional[List[Tuple[int, int]]],
+        timestamp: str,
+        embedding_model: str
+    ) -> Dict[str, Any]:
+        """Build the Qdrant payload for one chunk"""
+        payload = {
+            "document_id": document_id,
+            "chunk_index": chunk_index,
+            "timestamp": timestamp,
+            "embedding_model": embedding_model
+        }
+        if spans is not None:
+            start, end = spans[chunk_index]
+            payload["offset"] = start
+            payload["length"] = end - start
+        else:
+            payload["text"] = chunk
+        return payload
     
     async def search(
         self, 
         query: str, 
         top_k: int = 5, 
         document_ids: Optional[List[str]] = None,
-        score_threshold: float = 0.0
+        score_threshold: float = 0.0,
+        group_by_document: bool = False,
+        group_size: int = 3
     ) -> List[Dict[str, Any]]:
-        """Semantic search for relevant chunks"""
+        """Semantic search for relevant chunks
+        
+        With group_by_document, Qdrant returns the best group_size chunks of each
+        of top_k unique documents instead of top_k raw chunks, grouped by
+        document (best document first) and by score within a document.
+        """
         
         logger.info(f"Searching for: '{query}' (top_k={top_k})")
         
         # Generate query embedding
-        loop = asyncio.get_event_loop()
-        query_vector = await loop.run_in_executor(None, self.encoder.encode, query)
+        query_vector = await self._embed_query(query)
         
         # Build filter if document_ids specified
         query_filter = None
@@ -118,20 +293,36 @@ class VectorService:
                 must=[
                     FieldCondition(
                         key="document_id",
-                        match=MatchValue(value=doc_id)
-                    ) for doc_id in document_ids
+                        match=MatchAny(any=document_ids)
+                    )
                 ]
             )
         
+        search_params = self._search_params()
+        
         try:
-            # Perform search
-            results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_vector.tolist(),
-                query_filter=query_filter,
-                limit=top_k,
-                score_threshold=score_threshold
-            )
+            # Perform search (async client, so the event loop isn't blocked on the round-trip)
+            if group_by_document:
+                groups = await self.aclient.search_groups(
+                    collection_name=self.collection_name,
+                    query_vector=query_vector,
+                    group_by="document_id",
+                    query_filter=query_filter,
+                    limit=top_k,
+                    group_size=group_size,
+                    search_params=search_params,
+                    score_threshold=score_threshold
+                )
+                results = [hit for group in groups.groups for hit in group.hits]
+            else:
+                results = await self.aclient.search(
+                    collection_name=self.collection_name,
+                    query_vector=query_vector,
+                    query_filter=query_filter,
+                    search_params=search_params,
+                    limit=top_k,
+                    score_threshold=score_threshold
+                )
             
             # Format results
             formatted_results = []
@@ -140,7 +331,9 @@ class VectorService:
                     "id": hit.id,
                     "score": hit.score,
                     "document_id": hit.payload["document_id"],
-                    "text": hit.payload["text"],
+                    "text": hit.payload.get("text"),  # None when only offsets are stored
+                    "offset": hit.payload.get("offset"),
+                    "length": hit.payload.get("length"),
                     "chunk_index": hit.payload["chunk_index"],
                     "timestamp": hit.payload.get("timestamp"),
                     "embedding_model": hit.payload.get("embedding_model")
@@ -188,4 +381,9 @@ class VectorService:
             }
         except Exception as e:
             logger.error(f"Error getting collection info: {e}")
-            return {}
\ No newline at end of file
+            return {}
+
+@lru_cache(maxsize=1)
+def get_vector_service() -> VectorService:
+    """Get the process-wide VectorService (loads the embedding model only once)"""
+    return VectorService()
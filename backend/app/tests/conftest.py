@@ -0,0 +1,9 @@
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+
+# The models use PostgreSQL UUID columns; the tests run on SQLite, where they
+# are stored as CHAR(32). Registered here so it applies to every test module.
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
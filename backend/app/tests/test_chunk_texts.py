@@ -0,0 +1,104 @@
+import uuid
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models.document import Document
+from app.services.search_service import SearchService
+from app.services.text_processor import TextProcessor
+from app.services.vector_service import VectorService
+
+
+CONTENT = "Grüße aus Zürich. " * 40 + "The quick brown fox jumps over the lazy dog. " * 40
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def document(db):
+    doc = Document(
+        filename="sample.txt", original_filename="sample.txt",
+        content_type="text/plain", file_size=len(CONTENT), content=CONTENT
+    )
+    db.add(doc)
+    db.commit()
+    return doc
+
+
+def make_service(db) -> SearchService:
+    # Skip __init__ so no encoder or Qdrant client is created
+    service = SearchService.__new__(SearchService)
+    service.db = db
+    return service
+
+
+def offset_hits(document_id: str, spans):
+    """Search hits as returned for points that store only chunk offsets"""
+    hits = []
+    for i in range(len(spans)):
+        payload = VectorService._chunk_payload(document_id, i, None, spans, "", "test-model")
+        assert "text" not in payload
+        hits.append({"document_id": document_id, "text": None,
+                     "offset": payload["offset"], "length": payload["length"]})
+    return hits
+
+
+def test_fill_chunk_texts_rebuilds_chunks(db, document):
+    spans = TextProcessor().chunk_spans(CONTENT, chunk_size=200, overlap=30)
+    hits = offset_hits(str(document.id), spans)
+
+    make_service(db)._fill_chunk_texts(hits)
+
+    # Offsets are character offsets, including non-ASCII text
+    assert [hit["text"] for hit in hits] == [CONTENT[start:end] for start, end in spans]
+
+
+def test_fill_chunk_texts_deleted_document(db, document):
+    hits = offset_hits(str(document.id), [(0, 10)]) + offset_hits(str(uuid.uuid4()), [(0, 10)])
+    db.delete(document)
+    db.commit()
+
+    make_service(db)._fill_chunk_texts(hits)
+
+    assert [hit["text"] for hit in hits] == ["", ""]
+
+
+def test_fill_chunk_texts_keeps_legacy_text(db, document):
+    legacy = {"document_id": str(document.id), "text": "stored chunk text", "offset": None, "length": None}
+    hits = [legacy] + offset_hits(str(document.id), [(6, 12)])
+
+    make_service(db)._fill_chunk_texts(hits)
+
+    assert hits[0]["text"] == "stored chunk text"
+    assert hits[1]["text"] == CONTENT[6:12]
+
+
+def test_fill_chunk_texts_legacy_only_skips_query():
+    hits = [{"document_id": "not-a-uuid", "text": "stored chunk text"}]
+
+    make_service(None)._fill_chunk_texts(hits)  # no session: any query would fail
+
+    assert hits[0]["text"] == "stored chunk text"
+
+
+def test_point_ids_do_not_collide_across_documents():
+    # Same leading 40 bits, different documents
+    first = uuid.UUID("12345678-9a00-4000-8000-000000000001")
+    second = uuid.UUID("12345678-9a00-4000-8000-000000000002")
+    ids = {
+        VectorService._point_id(str(document_id), i, "same text")
+        for document_id in (first, second)
+        for i in range(3)
+    }
+    assert len(ids) == 6
+    assert VectorService._point_id(str(first), 0, "a") == VectorService._point_id(str(first), 0, "a")
+    assert VectorService._point_id(str(first), 0, "a") != VectorService._point_id(str(first), 0, "b")
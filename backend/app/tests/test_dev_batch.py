@@ -0,0 +1,48 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def debug_mode(monkeypatch):
+    monkeypatch.setattr("app.main.settings.debug", True)
+
+
+@pytest.fixture
+def failing_route():
+    async def fail():
+        raise RuntimeError("boom")
+    app.add_api_route("/test-only/fail", fail)
+    yield "/test-only/fail"
+    app.router.routes = [route for route in app.router.routes if getattr(route, "path", None) != "/test-only/fail"]
+
+
+def test_batch_endpoint(debug_mode):
+    response = client.post("/api/v1/dev/batch", json={"requests": [{"path": "/ping"}, {"path": "/health"}]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["status"] for item in data] == [200, 200]
+    assert data[0]["json"]["message"] == "pong"
+    assert all(item["elapsed_ms"] >= 0 for item in data)
+
+
+def test_batch_endpoint_isolates_failures(debug_mode, failing_route):
+    response = client.post("/api/v1/dev/batch", json={"requests": [{"path": failing_route}, {"path": "/ping"}]})
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["status"] for item in data] == [500, 200]
+    assert data[1]["json"]["message"] == "pong"
+
+
+def test_batch_endpoint_rejects_non_get(debug_mode):
+    response = client.post("/api/v1/dev/batch", json={"requests": [{"method": "POST", "path": "/ping"}]})
+    assert response.status_code == 400
+
+
+def test_batch_endpoint_hidden_outside_debug(monkeypatch):
+    monkeypatch.setattr("app.main.settings.debug", False)
+    response = client.post("/api/v1/dev/batch", json={"requests": [{"path": "/ping"}]})
+    assert response.status_code == 404
@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache, open_embedding_cache
+
+
+def test_round_trip_fp16(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), "model-a")
+    vectors = np.random.default_rng(0).standard_normal((3, 8)).astype(np.float32)
+    cache.put_many(["a", "b", "c"], vectors)
+
+    found = cache.get_many(["a", "b", "c"])
+
+    assert sorted(found) == [0, 1, 2]
+    for i, vector in found.items():
+        assert vector.dtype == np.float32
+        # Stored as fp16: equal up to half-precision rounding
+        np.testing.assert_allclose(vector, vectors[i], rtol=1e-3, atol=1e-3)
+        np.testing.assert_array_equal(vector, vectors[i].astype(np.float16).astype(np.float32))
+
+
+def test_partial_hits(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), "model-a")
+    cache.put_many(["cached"], np.ones((1, 4), dtype=np.float32))
+
+    found = cache.get_many(["missing", "cached", "also missing"])
+
+    assert list(found) == [1]
+    np.testing.assert_array_equal(found[1], np.ones(4, dtype=np.float32))
+
+
+def test_models_do_not_collide(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache_a = EmbeddingCache(path, "model-a")
+    cache_b = EmbeddingCache(path, "model-b")
+    cache_a.put_many(["same text"], np.zeros((1, 4), dtype=np.float32))
+
+    assert cache_b.get_many(["same text"]) == {}
+    assert list(cache_a.get_many(["same text"])) == [0]
+
+
+def test_disabled_or_unusable_cache(tmp_path):
+    assert open_embedding_cache(None, "model-a") is None
+    # A directory cannot be opened as an SQLite database
+    assert open_embedding_cache(str(tmp_path), "model-a") is None
@@ -0,0 +1,38 @@
+import asyncio
+
+from app.schemas.search import SearchRequest
+from app.services.search_service import SearchService
+
+
+class StubVectorService:
+    def __init__(self, hits):
+        self.hits = hits
+
+    async def search(self, **kwargs):
+        return [dict(hit) for hit in self.hits]
+
+
+def hit(doc_id: str, chunk_index: int, text: str, score: float):
+    return {"id": f"{doc_id}-{chunk_index}", "score": score, "document_id": doc_id, "text": text,
+            "chunk_index": chunk_index, "timestamp": None, "embedding_model": "test-model"}
+
+
+def make_service(hits) -> SearchService:
+    service = SearchService.__new__(SearchService)
+    service.db = None
+    service.vector_service = StubVectorService(hits)
+    service._get_document_meta = lambda doc_ids: {doc_id: (f"{doc_id}.txt", "text/plain") for doc_id in doc_ids}
+    return service
+
+
+def test_semantic_search_falls_back_to_next_chunk_of_document():
+    # Qdrant groups: best document first, chunks by score within each document
+    hits = [
+        hit("doc-a", 0, "Unrelated introduction text about something else", 0.9),
+        hit("doc-a", 3, "This paragraph explains how qdrant groups work", 0.8),
+        hit("doc-a", 5, "Another paragraph that mentions qdrant as well", 0.7),
+        hit("doc-b", 1, "Short note on qdrant collections and payloads", 0.6),
+    ]
+    response = asyncio.run(make_service(hits).semantic_search(SearchRequest(query="qdrant", top_k=5)))
+
+    assert [(r.document_id, r.chunk_index) for r in response.results] == [("doc-a", 3), ("doc-b", 1)]
@@ -0,0 +1,87 @@
+import asyncio
+
+from bs4 import BeautifulSoup
+
+from app.services.text_processor import READ_BLOCK_SIZE, TextProcessor
+
+processor = TextProcessor()
+
+def test_chunk_text_short_text():
+    assert processor.chunk_text("Short text.", chunk_size=100, overlap=10) == ["Short text."]
+
+def test_chunk_text_strips_chunk_whitespace():
+    text = "  First sentence here.   Second sentence follows.  " * 20
+    chunks = processor.chunk_text(text, chunk_size=100, overlap=20)
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk == chunk.strip()
+        assert chunk
+
+def test_chunk_text_breaks_at_sentence_end():
+    text = ("a" * 70) + ". " + ("b" * 100)
+    chunks = processor.chunk_text(text, chunk_size=100, overlap=10)
+    assert chunks[0] == ("a" * 70) + "."
+
+def test_chunk_spans_slice_to_chunks():
+    text = "  First sentence here.   Second sentence follows.  " * 20
+    spans = processor.chunk_spans(text, chunk_size=100, overlap=20)
+    assert [text[start:end] for start, end in spans] == processor.chunk_text(text, chunk_size=100, overlap=20)
+
+def html_text(tmp_path, html: str) -> str:
+    path = tmp_path / "page.html"
+    path.write_text(html, encoding="utf-8")
+    return asyncio.run(processor._extract_from_html(path))
+
+def beautifulsoup_text(html: str) -> str:
+    """The BeautifulSoup-based extraction the streaming parser replaced"""
+    text = BeautifulSoup(html, "html.parser").get_text()
+    return "\n".join(line.strip() for line in text.splitlines() if line.strip())
+
+def test_html_skips_script_style_template(tmp_path):
+    html = (
+        "<html><head><style>p { color: red }</style><script>var x = '<p>';</script></head>"
+        "<body><p>Visible</p><template><p>Hidden</p></template></body></html>"
+    )
+    assert html_text(tmp_path, html) == "Visible"
+
+def test_html_block_elements_break_lines(tmp_path):
+    html = "<div><h1>Title</h1><p>First</p><p>Second<br>line</p><ul><li>one</li><li>two</li></ul></div>"
+    assert html_text(tmp_path, html).splitlines() == ["Title", "First", "Second", "line", "one", "two"]
+    # Inline elements do not split text
+    assert html_text(tmp_path, "<p>bold <b>word</b> here</p>") == "bold word here"
+
+def test_html_entities_and_tags_across_read_blocks(tmp_path):
+    # "&amp;" and "<script>" each straddle a READ_BLOCK_SIZE boundary
+    prefix = "<p>" + "x" * (READ_BLOCK_SIZE - 3 - 2)
+    middle = "&amp;y</p>"
+    padding = "z" * (2 * READ_BLOCK_SIZE - len(prefix) - len(middle) - 4)
+    html = prefix + middle + padding + "<script>hidden()</script><p>end &lt;3</p>"
+    assert html.index("&amp;") == READ_BLOCK_SIZE - 2
+    assert html.index("<script>") == 2 * READ_BLOCK_SIZE - 4
+
+    lines = html_text(tmp_path, html).splitlines()
+    assert lines[0] == "x" * (READ_BLOCK_SIZE - 5) + "&y"
+    assert "hidden()" not in lines[1]
+    assert lines[-1] == "end <3"
+
+def test_html_matches_beautifulsoup_extraction(tmp_path):
+    html = """<!DOCTYPE html>
+<html>
+  <head>
+    <title>Sample &amp; Test</title>
+    <style>body { font-family: sans-serif; }</style>
+    <script type="text/javascript">console.log("ignored");</script>
+  </head>
+  <body>
+    <h1>RagFlow &mdash; Documents</h1>
+    <p>Upload a <a href="/docs">document</a> and search it with <em>semantic</em> queries.</p>
+    <ul>
+      <li>PDF, DOCX &amp; TXT</li>
+      <li>Markdown &lt;md&gt;</li>
+    </ul>
+    <!-- comments are dropped -->
+    <p>Gr&uuml;&szlig;e aus Z&#252;rich</p>
+  </body>
+</html>
+"""
+    assert html_text(tmp_path, html) == beautifulsoup_text(html)
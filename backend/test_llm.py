@@ -2,75 +2,83 @@
 """
 Test script for LLM integration
 Run this to test Gemini and Ollama connections
+(also collected by pytest as opt-in tests: RAGFLOW_LLM_TESTS=1 pytest test_llm.py)
 """
 
 import asyncio
 import os
 import sys
 from pathlib import Path
+from typing import Callable, List, Optional
+
+import pytest
 
 # Add backend to path
 sys.path.append(str(Path(__file__).parent))
 
-from app.services.llm_service import LLMService, LLMProvider
+from app.services.llm_service import LLMService, LLMProvider, GeminiClient, OllamaClient
 from app.core.config import settings
 
-async def test_gemini():
+def make_gemini_client() -> Optional[GeminiClient]:
+    """Gemini client, or None when no API key is configured"""
+    if not settings.google_api_key:
+        return None
+    return GeminiClient(settings.google_api_key)
+
+def make_ollama_client() -> OllamaClient:
+    """Ollama client for the configured URL and model"""
+    return OllamaClient(settings.ollama_url, settings.ollama_model)
+
+async def check_gemini(client: Optional[GeminiClient], log: Callable[[str], None] = print) -> bool:
     """Test Google Gemini connection"""
-    print("🧪 Testing Google Gemini...")
+    log("🧪 Testing Google Gemini...")
     
-    if not settings.google_api_key:
-        print("❌ GOOGLE_API_KEY not set in environment")
+    if client is None:
+        log("❌ GOOGLE_API_KEY not set in environment")
         return False
     
     try:
-        from app.services.llm_service import GeminiClient
-        client = GeminiClient(settings.google_api_key)
-        
         messages = [
             {"role": "user", "content": "Say 'Gemini test successful' if you can read this"}
         ]
         
         response = await client.generate_response(messages, max_tokens=50)
-        print(f"✅ Gemini Response: {response}")
+        log(f"✅ Gemini Response: {response}")
         return True
         
     except Exception as e:
-        print(f"❌ Gemini Error: {e}")
+        log(f"❌ Gemini Error: {e}")
         return False
 
-async def test_ollama():
+async def check_ollama(client: OllamaClient, log: Callable[[str], None] = print) -> bool:
     """Test Ollama connection"""
-    print("\n🦙 Testing Ollama...")
-    print("💡 Note: Ollama is optional and only used if available")
+    log("\n🦙 Testing Ollama...")
+    log("💡 Note: Ollama is optional and only used if available")
     
     try:
-        from app.services.llm_service import OllamaClient
-        client = OllamaClient(settings.ollama_url, settings.ollama_model)
-        
         # Check health first
         is_healthy = await client._check_health()
         if not is_healthy:
-            print("ℹ️  Ollama service not available at", settings.ollama_url)
-            print("💡 This is optional! You can:")
-            print("   • Install Ollama: curl -fsSL https://ollama.ai/install.sh | sh")
-            print("   • Or use Docker: docker run -d -p 11434:11434 ollama/ollama")
-            print("   • Or just use Gemini only")
+            log(f"ℹ️  Ollama service not available at {settings.ollama_url}")
+            log("💡 This is optional! You can:")
+            log("   • Install Ollama: curl -fsSL https://ollama.ai/install.sh | sh")
+            log("   • Or use Docker: docker run -d -p 11434:11434 ollama/ollama")
+            log("   • Or just use Gemini only")
             return False
         
         # List available models
         models = await client.list_models()
-        print(f"📋 Available models: {models}")
+        log(f"📋 Available models: {models}")
         
         if not models:
-            print("⚠️  No models installed in Ollama")
-            print(f"💡 Install a model: ollama pull {settings.ollama_model}")
+            log("⚠️  No models installed in Ollama")
+            log(f"💡 Install a model: ollama pull {settings.ollama_model}")
             return False
         
         if settings.ollama_model not in [m.split(':')[0] for m in models]:
-            print(f"⚠️  Model '{settings.ollama_model}' not found")
-            print(f"💡 Install model: ollama pull {settings.ollama_model}")
-            print(f"📋 Available: {models}")
+            log(f"⚠️  Model '{settings.ollama_model}' not found")
+            log(f"💡 Install model: ollama pull {settings.ollama_model}")
+            log(f"📋 Available: {models}")
             return False
         
         # Test generation
@@ -79,52 +87,61 @@ async def test_ollama():
         ]
         
         response = await client.generate_response(messages, max_tokens=50)
-        print(f"✅ Ollama Response: {response}")
+        log(f"✅ Ollama Response: {response}")
         return True
         
     except Exception as e:
-        print(f"ℹ️  Ollama not available: {e}")
-        print("💡 This is optional - system works fine with just Gemini!")
+        log(f"ℹ️  Ollama not available: {e}")
+        log("💡 This is optional - system works fine with just Gemini!")
         return False
 
-async def test_llm_service():
+async def _test_provider(llm_service: LLMService, provider_name: str, log: Callable[[str], None]):
+    """Send one test prompt through LLMService to a single provider"""
+    log(f"\n🧪 Testing provider: {provider_name}")
+    
+    try:
+        provider = LLMProvider(provider_name)
+        result = await llm_service.generate_response(
+            messages=[{"role": "user", "content": f"Say '{provider_name} via LLMService works!'"}],
+            provider=provider,
+            max_tokens=50
+        )
+        
+        if result["success"]:
+            log(f"✅ {provider_name}: {result['response']}")
+        else:
+            log(f"❌ {provider_name}: {result.get('error', 'Unknown error')}")
+            
+    except Exception as e:
+        log(f"❌ {provider_name}: {e}")
+
+async def check_llm_service(llm_service: LLMService, log: Callable[[str], None] = print) -> bool:
     """Test the unified LLM service"""
-    print("\n🔧 Testing LLM Service...")
+    log("\n🔧 Testing LLM Service...")
     
     try:
-        llm_service = LLMService()
         providers = llm_service.get_available_providers()
         
-        print(f"📡 Available providers: {providers}")
+        log(f"📡 Available providers: {providers}")
         
         if not providers:
-            print("❌ No LLM providers available!")
+            log("❌ No LLM providers available!")
             return False
         
-        # Test each provider
-        for provider_name in providers:
-            print(f"\n🧪 Testing provider: {provider_name}")
-            
-            try:
-                provider = LLMProvider(provider_name)
-                result = await llm_service.generate_response(
-                    messages=[{"role": "user", "content": f"Say '{provider_name} via LLMService works!'"}],
-                    provider=provider,
-                    max_tokens=50
-                )
-                
-                if result["success"]:
-                    print(f"✅ {provider_name}: {result['response']}")
-                else:
-                    print(f"❌ {provider_name}: {result.get('error', 'Unknown error')}")
-                    
-            except Exception as e:
-                print(f"❌ {provider_name}: {e}")
+        # Test all providers concurrently, then report them in order
+        outputs: List[List[str]] = [[] for _ in providers]
+        await asyncio.gather(*(
+            _test_provider(llm_service, provider_name, lines.append)
+            for provider_name, lines in zip(providers, outputs)
+        ))
+        for lines in outputs:
+            for line in lines:
+                log(line)
         
         return True
         
     except Exception as e:
-        print(f"❌ LLM Service Error: {e}")
+        log(f"❌ LLM Service Error: {e}")
         return False
 
 async def main():
@@ -139,10 +156,19 @@ async def main():
     print(f"   Ollama Model: {settings.ollama_model}")
     print()
     
-    # Run tests
-    gemini_ok = await test_gemini()
-    ollama_ok = await test_ollama()
-    service_ok = await test_llm_service()
+    # Run tests (independent network round-trips, so run them concurrently)
+    outputs: List[List[str]] = [[], [], []]
+    results = await asyncio.gather(
+        check_gemini(make_gemini_client(), outputs[0].append),
+        check_ollama(make_ollama_client(), outputs[1].append),
+        check_llm_service(LLMService(), outputs[2].append),
+        return_exceptions=True
+    )
+    # Print each section in order once every check has finished
+    for lines in outputs:
+        for line in lines:
+            print(line)
+    gemini_ok, ollama_ok, service_ok = (result is True for result in results)
     
     # Summary
     print("\n📊 Test Summary:")
@@ -166,6 +192,35 @@ async def main():
         print("• Gemini: Set GOOGLE_API_KEY in .env")
         print("• Ollama: Install and run Ollama locally")
 
+# pytest entry points: these call the live LLM APIs (quota, network), so they
+# only run when explicitly requested with RAGFLOW_LLM_TESTS=1
+
+pytestmark = pytest.mark.skipif(
+    os.getenv("RAGFLOW_LLM_TESTS") != "1",
+    reason="live LLM integration tests; set RAGFLOW_LLM_TESTS=1 to run"
+)
+
+@pytest.mark.asyncio
+async def test_gemini():
+    client = make_gemini_client()
+    if client is None:
+        pytest.skip("GOOGLE_API_KEY not set")
+    assert await check_gemini(client)
+
+@pytest.mark.asyncio
+async def test_ollama():
+    client = make_ollama_client()
+    if not await client._check_health():
+        pytest.skip("Ollama not available")
+    assert await check_ollama(client)
+
+@pytest.mark.asyncio
+async def test_llm_service():
+    llm_service = LLMService()
+    if not llm_service.get_available_providers():
+        pytest.skip("No LLM providers available")
+    assert await check_llm_service(llm_service)
+
 if __name__ == "__main__":
     # Set environment variables if .env file exists
     env_file = Path(__file__).parent / ".env"
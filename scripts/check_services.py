@@ -4,16 +4,30 @@ Windows-Compatible RagFlow Service Checker
 Ersetzt die fehlerhafte start_dev.py Health-Check Logik
 """
 
+import argparse
 import requests
+from requests.adapters import HTTPAdapter
 import socket
 import time
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import docker  # optional: lets us skip spawning the docker CLI
+except ImportError:
+    docker = None
+
+# Shared session: probes against the same host reuse one kept-alive connection
+SESSION = requests.Session()
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=0)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
 
 def test_http(url, expected_codes=[200, 404]):
     """Test HTTP endpoint"""
     try:
-        response = requests.get(url, timeout=5)
+        response = SESSION.get(url, timeout=2)
         return response.status_code in expected_codes, response.status_code
     except Exception as e:
         return False, str(e)
@@ -21,16 +35,36 @@ def test_http(url, expected_codes=[200, 404]):
 def test_tcp_port(host, port):
     """Test TCP port connection"""
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(3)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        return result == 0, result
+        # Resolves the host (IPv4/IPv6) and closes the socket on exit
+        with socket.create_connection((host, port), timeout=0.5):
+            return True, 0
     except Exception as e:
         return False, str(e)
 
+_docker_client = None
+
+def _list_containers_sdk():
+    """Container (name, status) rows via the Docker SDK, reusing one daemon connection"""
+    global _docker_client
+    if _docker_client is None:
+        _docker_client = docker.from_env()
+    # sparse=True: one list call, no per-container inspect
+    containers = _docker_client.containers.list(sparse=True)
+    return [(c.attrs["Names"][0].lstrip("/"), c.attrs["Status"]) for c in containers]
+
 def check_docker_containers():
     """Check Docker container status"""
+    # Talk to the daemon directly when the SDK is installed (no docker CLI process)
+    if docker is not None:
+        try:
+            rows = _list_containers_sdk()
+            print("🐳 Docker Container Status:")
+            print("NAMES\tSTATUS")
+            print("\n".join(f"{name}\t{status}" for name, status in rows))
+            return True
+        except Exception:
+            pass  # daemon unreachable through the SDK, fall back to the CLI
+    
     try:
         result = subprocess.run(['docker', 'ps', '--format', 'table {{.Names}}\t{{.Status}}'], 
                               capture_output=True, text=True)
@@ -45,7 +79,45 @@ def check_docker_containers():
         print(f"❌ Docker check failed: {e}")
         return False
 
+def probe(name, test_type, endpoint):
+    """Run one service check and return (name, success, status text)"""
+    if test_type == "http":
+        success, result = test_http(endpoint)
+        return name, success, f"HTTP {result}" if success else str(result)
+    
+    host, port = endpoint.split(":")
+    success, result = test_tcp_port(host, int(port))
+    return name, success, "Connected" if success else f"Connection failed: {result}"
+
+def probe_until_healthy(services, wait):
+    """Probe all services, re-probing failed ones with backoff for up to `wait` seconds"""
+    results = {}
+    pending = list(services)
+    deadline = time.perf_counter() + wait
+    delay = 0.05
+    
+    while True:
+        # All checks are independent I/O, so run them at once
+        with ThreadPoolExecutor(max_workers=len(pending)) as executor:
+            for result in executor.map(lambda service: probe(*service), pending):
+                results[result[0]] = result
+        
+        # Only services that are still failing get probed again
+        pending = [service for service in pending if not results[service[0]][1]]
+        if not pending or time.perf_counter() + delay > deadline:
+            break
+        time.sleep(delay)
+        delay = min(delay * 1.3, 2.0)
+    
+    # Report in the original service order
+    return [results[name] for name, _, _ in services]
+
 def main():
+    parser = argparse.ArgumentParser(description="RagFlow Service Health Check")
+    parser.add_argument("--wait", type=float, default=0, metavar="SECONDS",
+                       help="Keep re-checking failing services for up to SECONDS")
+    args = parser.parse_args()
+    
     print("🚀 RagFlow Service Health Check (Windows Compatible)")
     print("=" * 60)
     
@@ -71,27 +143,16 @@ def main():
     print("🔍 Service Connectivity Tests:")
     print("-" * 60)
     
+    results = probe_until_healthy(services, args.wait)
+    
     all_good = True
     
-    for name, test_type, endpoint in services:
-        print(f"  {name:<20} ... ", end="", flush=True)
-        
-        if test_type == "http":
-            success, result = test_http(endpoint)
-            if success:
-                print(f"✅ (HTTP {result})")
-            else:
-                print(f"❌ ({result})")
-                all_good = False
-                
-        elif test_type == "tcp":
-            host, port = endpoint.split(":")
-            success, result = test_tcp_port(host, int(port))
-            if success:
-                print(f"✅ (Connected)")
-            else:
-                print(f"❌ (Connection failed: {result})")
-                all_good = False
+    for name, success, detail in results:
+        if success:
+            print(f"  {name:<20} ... ✅ ({detail})")
+        else:
+            print(f"  {name:<20} ... ❌ ({detail})")
+            all_good = False
     
     print("-" * 60)
     
@@ -11,10 +11,12 @@ import json
 import hashlib
 import time
 import signal
-import requests
 import socket
+import struct
+from stat import S_ISREG
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
 class Colors:
     """ANSI color codes for cross-platform terminal"""
@@ -31,125 +33,170 @@ def print_colored(text: str, color: str = Colors.RESET):
     """Print colored text"""
     print(f"{color}{text}{Colors.RESET}")
 
-def run_command(command: str, cwd: Optional[str] = None, check: bool = True, capture_output: bool = True) -> Optional[subprocess.CompletedProcess]:
-    """Execute a command and return the result"""
+# Every compose call targets the dev stack
+COMPOSE_COMMAND = ["docker", "compose", "-f", "docker/docker-compose.dev.yml"]
+
+# Build with BuildKit (parallel stages, better layer reuse) unless the user opted out
+COMMAND_ENV = {"DOCKER_BUILDKIT": "1", "COMPOSE_DOCKER_CLI_BUILD": "1", **os.environ}
+
+def run_command(command: List[str], cwd: Optional[str] = None, check: bool = True, capture_output: bool = True) -> Optional[subprocess.CompletedProcess]:
+    """Execute a command (argv list, no shell) and return the result"""
     try:
         result = subprocess.run(
             command, 
-            shell=True, 
             cwd=cwd, 
             check=check,
             capture_output=capture_output,
             text=True,
+            env=COMMAND_ENV,
             timeout=300  # 5 minute timeout
         )
         return result
     except subprocess.CalledProcessError as e:
         if capture_output:
-            print_colored(f"❌ Error executing '{command}': {e}", Colors.RED)
+            print_colored(f"❌ Error executing '{' '.join(command)}': {e}", Colors.RED)
             if e.stdout:
                 print(f"STDOUT: {e.stdout}")
             if e.stderr:
                 print(f"STDERR: {e.stderr}")
         return None
     except subprocess.TimeoutExpired:
-        print_colored(f"⏰ Command timed out: {command}", Colors.YELLOW)
+        print_colored(f"⏰ Command timed out: {' '.join(command)}", Colors.YELLOW)
+        return None
+    except FileNotFoundError:
+        print_colored(f"❌ Command not found: {command[0]}", Colors.RED)
         return None
 
 def get_file_hash(filepath: str) -> Optional[str]:
-    """Create SHA256 hash of a file"""
+    """Create BLAKE2b hash of a file"""
     try:
         with open(filepath, "rb") as f:
-            return hashlib.sha256(f.read()).hexdigest()
+            if hasattr(hashlib, "file_digest"):  # Python 3.11+
+                return hashlib.file_digest(f, "blake2b").hexdigest()
+            file_hash = hashlib.blake2b()
+            while chunk := f.read(65536):
+                file_hash.update(chunk)
+            return file_hash.hexdigest()
     except FileNotFoundError:
         return None
 
 def get_directory_hash(directory: str, patterns: List[str]) -> str:
-    """Get hash of directory contents matching patterns"""
-    hash_content = ""
+    """Get a change-detection fingerprint of directory contents matching patterns"""
     dir_path = Path(directory)
     
     if not dir_path.exists():
         return ""
     
-    for pattern in patterns:
-        for file_path in dir_path.rglob(pattern):
-            if file_path.is_file():
-                try:
-                    hash_content += str(file_path.stat().st_mtime)
-                    hash_content += str(file_path.stat().st_size)
-                except:
-                    continue
-    
-    return hashlib.sha256(hash_content.encode()).hexdigest()
+    # One walk for all patterns ("*.ts" -> "ts"), skipping dependency trees
+    extensions = {pattern.lstrip("*.") for pattern in patterns}
+    
+    # Order-independent 64-bit XOR of per-file (path, mtime_ns, size) digests.
+    # This is only a local cache key; hash() is salted per process, so use blake2b.
+    fingerprint = 0
+    for root, dirs, files in os.walk(dir_path):
+        dirs[:] = [d for d in dirs if d not in ("node_modules", "__pycache__")]
+        for name in files:
+            if name.rpartition(".")[2] not in extensions:
+                continue
+            file_path = os.path.join(root, name)
+            try:
+                file_stat = os.stat(file_path)  # one stat per file
+            except OSError:
+                continue
+            if S_ISREG(file_stat.st_mode):
+                entry = hashlib.blake2b(file_path.encode(), digest_size=8)
+                entry.update(struct.pack("<qq", file_stat.st_mtime_ns, file_stat.st_size))
+                fingerprint ^= int.from_bytes(entry.digest(), "little")
+    
+    return f"{fingerprint:016x}"
 
 def check_docker_running() -> bool:
     """Check if Docker is running"""
-    try:
-        result = run_command("docker --version", capture_output=True)
-        if result and result.returncode == 0:
-            # Test Docker daemon
-            result = run_command("docker ps", capture_output=True)
-            return result is not None and result.returncode == 0
-    except:
-        pass
-    return False
+    # One probe covers both: a missing CLI fails to launch, a stopped daemon exits non-zero
+    result = run_command(["docker", "version", "--format", "{{.Server.Version}}"], capture_output=True, check=False)
+    return result is not None and result.returncode == 0
 
-def get_change_detection() -> Dict[str, str]:
-    """Get current hashes of important files/directories"""
-    hashes = {}
-    
-    # Backend files
-    backend_files = [
-        "backend/requirements.txt",
-        "backend/Dockerfile.dev",
-        "docker/docker-compose.dev.yml"
-    ]
-    
-    for file_path in backend_files:
-        if Path(file_path).exists():
-            hashes[file_path] = get_file_hash(file_path) or ""
-    
-    # Backend source code hash
-    hashes["backend_src"] = get_directory_hash("backend/app", ["*.py"])
-    
-    # Frontend files
-    frontend_files = [
-        "frontend/package.json",
-        "frontend/package-lock.json",
-        "frontend/Dockerfile.dev",
-        "frontend/next.config.ts",
-        "frontend/tailwind.config.ts"
-    ]
-    
-    for file_path in frontend_files:
-        if Path(file_path).exists():
-            hashes[file_path] = get_file_hash(file_path) or ""
-    
-    # Frontend source code hash
-    hashes["frontend_src"] = get_directory_hash("frontend/src", ["*.tsx", "*.ts", "*.js", "*.jsx"])
+BACKEND_FILES = [
+    "backend/requirements.txt",
+    "backend/Dockerfile.dev",
+    "docker/docker-compose.dev.yml"
+]
+
+FRONTEND_FILES = [
+    "frontend/package.json",
+    "frontend/package-lock.json",
+    "frontend/Dockerfile.dev",
+    "frontend/next.config.ts",
+    "frontend/tailwind.config.ts"
+]
+
+def get_file_hash_cached(filepath: str, stored: Dict[str, Any]) -> Tuple[str, List[int]]:
+    """Hash a file, reusing the stored hash when its mtime and size are unchanged"""
+    file_stat = os.stat(filepath)
+    stat_key = [file_stat.st_mtime_ns, file_stat.st_size]
+    if stored.get("file_stats", {}).get(filepath) == stat_key and stored.get(filepath):
+        return stored[filepath], stat_key
+    return get_file_hash(filepath) or "", stat_key
+
+def _hash_inputs(files: List[str], src_key: str, src_dir: str, patterns: List[str],
+                 stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Hash the given files plus a source tree fingerprint"""
+    files = [f for f in files if Path(f).exists()]
+    
+    # Independent reads/stats; hashlib releases the GIL, so overlap them
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        file_results = executor.map(lambda f: get_file_hash_cached(f, stored), files)
+        src_hash = executor.submit(get_directory_hash, src_dir, patterns)
+        
+        hashes = {"file_stats": {}}
+        for file_path, (file_hash, stat_key) in zip(files, file_results):
+            hashes[file_path] = file_hash
+            hashes["file_stats"][file_path] = stat_key
+        hashes[src_key] = src_hash.result()
     
     return hashes
 
-def load_stored_hashes() -> Dict[str, str]:
+def get_backend_hashes(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Get current hashes of the backend build inputs"""
+    return _hash_inputs(BACKEND_FILES, "backend_src", "backend/app", ["*.py"], stored)
+
+def get_frontend_hashes(stored: Dict[str, Any]) -> Dict[str, Any]:
+    """Get current hashes of the frontend build inputs"""
+    return _hash_inputs(FRONTEND_FILES, "frontend_src", "frontend/src", ["*.tsx", "*.ts", "*.js", "*.jsx"], stored)
+
+def get_change_detection(stored: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Get current hashes of important files/directories"""
+    stored = stored or {}
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        backend_future = executor.submit(get_backend_hashes, stored)
+        frontend_future = executor.submit(get_frontend_hashes, stored)
+        backend, frontend = backend_future.result(), frontend_future.result()
+    # (mtime_ns, size) per file lets the next run skip re-hashing unchanged files
+    file_stats = {**backend["file_stats"], **frontend["file_stats"]}
+    return {**backend, **frontend, "file_stats": file_stats}
+
+def load_stored_hashes() -> Dict[str, Any]:
     """Load stored hashes from cache file"""
     cache_file = Path(".dev_cache.json")
     if cache_file.exists():
         try:
             return json.loads(cache_file.read_text())
-        except:
+        except (OSError, json.JSONDecodeError):
             return {}
     return {}
 
-def store_hashes(hashes: Dict[str, str]):
+def store_hashes(hashes: Dict[str, Any]):
     """Store hashes to cache file"""
     cache_file = Path(".dev_cache.json")
-    cache_file.write_text(json.dumps(hashes, indent=2))
+    # Write then rename, so an interrupted run never leaves a truncated cache
+    tmp_file = cache_file.with_suffix(".json.tmp")
+    tmp_file.write_text(json.dumps(hashes, separators=(",", ":")))
+    os.replace(tmp_file, cache_file)
 
-def needs_rebuild() -> Dict[str, bool]:
+def needs_rebuild(current_hashes: Dict[str, Any], stored_hashes: Optional[Dict[str, Any]] = None) -> Dict[str, bool]:
     """Determine what needs rebuilding"""
-    current_hashes = get_change_detection()
-    stored_hashes = load_stored_hashes()
+    if stored_hashes is None:
+        stored_hashes = load_stored_hashes()
     
     needs_rebuild = {
         "backend": False,
@@ -157,19 +204,13 @@ def needs_rebuild() -> Dict[str, bool]:
         "full_restart": False
     }
     
-    # Check backend changes
-    backend_keys = [k for k in current_hashes.keys() if k.startswith("backend") or k == "docker/docker-compose.dev.yml"]
-    for key in backend_keys:
-        if current_hashes.get(key) != stored_hashes.get(key):
-            needs_rebuild["backend"] = True
-            break
+    # Check backend changes (any() stops at the first mismatch)
+    backend_keys = [k for k in current_hashes if k.startswith("backend") or k == "docker/docker-compose.dev.yml"]
+    needs_rebuild["backend"] = any(current_hashes.get(k) != stored_hashes.get(k) for k in backend_keys)
     
     # Check frontend changes
-    frontend_keys = [k for k in current_hashes.keys() if k.startswith("frontend")]
-    for key in frontend_keys:
-        if current_hashes.get(key) != stored_hashes.get(key):
-            needs_rebuild["frontend"] = True
-            break
+    frontend_keys = [k for k in current_hashes if k.startswith("frontend")]
+    needs_rebuild["frontend"] = any(current_hashes.get(k) != stored_hashes.get(k) for k in frontend_keys)
     
     # Check for docker-compose changes (requires full restart)
     if current_hashes.get("docker/docker-compose.dev.yml") != stored_hashes.get("docker/docker-compose.dev.yml"):
@@ -178,57 +219,86 @@ def needs_rebuild() -> Dict[str, bool]:
     return needs_rebuild
 
 def get_container_status() -> Dict[str, str]:
-    """Get status of all containers"""
-    result = run_command("docker compose -f docker/docker-compose.dev.yml ps", capture_output=True)
+    """Get status of all containers, keyed by compose service name"""
+    result = run_command([*COMPOSE_COMMAND, "ps", "--format", "json"], capture_output=True)
     containers = {}
     
-    if result and result.returncode == 0:
-        lines = result.stdout.strip().split('\n')[1:]  # Skip header
-        for line in lines:
-            if line.strip():
-                parts = line.split()
-                if len(parts) >= 2:
-                    name = parts[0]
-                    # Extract service name from container name
-                    if "ragflow-" in name:
-                        service = name.replace("ragflow-", "")
-                        containers[service] = " ".join(parts[1:])
+    if not result or result.returncode != 0 or not result.stdout.strip():
+        return containers
+    
+    # Older compose versions print one JSON array, newer ones one object per line
+    try:
+        entries = json.loads(result.stdout)
+    except json.JSONDecodeError:
+        try:
+            entries = [json.loads(line) for line in result.stdout.splitlines() if line.strip()]
+        except json.JSONDecodeError:
+            return containers  # unparseable: treat as nothing running
+    if isinstance(entries, dict):
+        entries = [entries]
+    
+    for entry in entries:
+        service = entry.get("Service")
+        if service:
+            containers[service] = entry.get("Status", "")
     
     return containers
 
-def wait_for_service(url: str, service_name: str, timeout: int = 60) -> bool:
-    """Wait for a service to become available"""
+_session = None
+
+def get_http_session():
+    """Shared HTTP session, so polls against the same host reuse kept-alive connections"""
+    global _session
+    if _session is None:
+        import requests  # deferred: only needed once services are being polled
+        from requests.adapters import HTTPAdapter
+        
+        _session = requests.Session()
+        _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0))
+    return _session
+
+def wait_for_service(url: str, service_name: str, timeout: float = 60) -> Optional[float]:
+    """Wait for a service to become available; return seconds until ready, or None"""
     print_colored(f"⏳ Waiting for {service_name}...", Colors.YELLOW)
     
-    start_time = time.time()
-    while time.time() - start_time < timeout:
+    # Kept-alive connections for all polls, with exponential backoff between them
+    session = get_http_session()
+    delay = 0.05
+    start = time.monotonic()
+    deadline = start + timeout
+    while time.monotonic() < deadline:
         try:
-            response = requests.get(url, timeout=5)
+            response = session.get(url, timeout=2)
             if response.status_code < 500:  # Accept any non-server-error response
                 print_colored(f"✅ {service_name} is ready!", Colors.GREEN)
-                return True
+                return time.monotonic() - start
         except:
             pass
         
-        time.sleep(2)
+        time.sleep(min(delay, max(0, deadline - time.monotonic())))
+        delay = min(delay * 1.3, 5.0)
     
     print_colored(f"⚠️  {service_name} may not be ready yet", Colors.YELLOW)
-    return False
+    return None
+
+def wait_timeout(service_name: str, ready_times: Dict[str, float]) -> float:
+    """Readiness timeout based on how long the service took on previous runs"""
+    # Never below the default: a warm run records ~0s, but the next rebuild or
+    # cold start still has to load the embedding model. Slow services get more.
+    return min(max(60, 2 * ready_times.get(service_name, 0)), 120)
 
 def start_services(rebuild_config: Dict[str, bool]) -> bool:
     """Start or restart services based on rebuild configuration"""
-    compose_file = "docker/docker-compose.dev.yml"
-    
     if rebuild_config["full_restart"]:
         print_colored("🔄 Full restart required - stopping all services...", Colors.BLUE)
         
         # Stop all services
-        result = run_command(f"docker compose -f {compose_file} down", capture_output=False)
+        result = run_command([*COMPOSE_COMMAND, "down"], capture_output=False)
         if not result:
             return False
         
         print_colored("🚀 Starting all services with build...", Colors.BLUE)
-        result = run_command(f"docker compose -f {compose_file} up --build -d", capture_output=False)
+        result = run_command([*COMPOSE_COMMAND, "up", "--build", "-d"], capture_output=False)
         return result is not None and result.returncode == 0
     
     elif rebuild_config["backend"] or rebuild_config["frontend"]:
@@ -244,12 +314,14 @@ def start_services(rebuild_config: Dict[str, bool]) -> bool:
         
         print_colored(f"🚀 Rebuilding services: {', '.join(services_to_rebuild)}", Colors.BLUE)
         
-        for service in services_to_rebuild:
-            print_colored(f"🔨 Rebuilding {service}...", Colors.BLUE)
-            result = run_command(f"docker compose -f {compose_file} up --build {service} -d", capture_output=False)
-            if not result or result.returncode != 0:
-                print_colored(f"❌ Failed to rebuild {service}", Colors.RED)
-                return False
+        # One compose call builds and starts the services in parallel
+        result = run_command(
+            [*COMPOSE_COMMAND, "up", "--build", "-d", *services_to_rebuild],
+            capture_output=False
+        )
+        if not result or result.returncode != 0:
+            print_colored(f"❌ Failed to rebuild {', '.join(services_to_rebuild)}", Colors.RED)
+            return False
         
         return True
     
@@ -265,14 +337,17 @@ def start_services(rebuild_config: Dict[str, bool]) -> bool:
         
         if missing_services:
             print_colored(f"🚀 Starting services: {', '.join(missing_services)}", Colors.BLUE)
-            result = run_command(f"docker compose -f {compose_file} up -d", capture_output=False)
+            result = run_command([*COMPOSE_COMMAND, "up", "-d"], capture_output=False)
             return result is not None and result.returncode == 0
         else:
             print_colored("✅ All services are already running", Colors.GREEN)
             return True
 
-def show_service_status():
+def show_service_status(ready: Optional[Dict[str, bool]] = None):
     """Show detailed service status"""
+    ready = ready or {}
+    session = get_http_session()
+    
     print_colored("\n🌐 Service Status:", Colors.CYAN)
     
     services = {
@@ -282,8 +357,12 @@ def show_service_status():
     }
     
     for name, url in services.items():
+        # Services the readiness wait already confirmed need no second request
+        if ready.get(name):
+            print_colored(f"   ✅ {name}: Running", Colors.GREEN)
+            continue
         try:
-            response = requests.get(url, timeout=5)
+            response = session.get(url, timeout=5)
             if response.status_code < 500:
                 print_colored(f"   ✅ {name}: Running", Colors.GREEN)
             else:
@@ -342,7 +421,11 @@ def main():
     
     # Check what needs rebuilding
     print_colored("\n🔍 Checking for changes...", Colors.BLUE)
-    rebuild_config = needs_rebuild()
+    # Hash once per run; the same hashes are stored for the next run below
+    stored_hashes = load_stored_hashes()
+    current_hashes = get_change_detection(stored_hashes)
+    ready_times = stored_hashes.get("ready_times", {})
+    rebuild_config = needs_rebuild(current_hashes, stored_hashes)
     
     if any(rebuild_config.values()):
         print_colored("🔄 Changes detected, rebuilding services...", Colors.YELLOW)
@@ -357,15 +440,28 @@ def main():
     
     # Wait for critical services
     print_colored("\n⏳ Waiting for services to be ready...", Colors.BLUE)
-    backend_ready = wait_for_service("http://localhost:8000/ping", "Backend API", 60)
-    frontend_ready = wait_for_service("http://localhost:3000", "Frontend App", 60)
+    # Poll both at once so the total wait is the slower service, not the sum
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        backend_future = executor.submit(wait_for_service, "http://localhost:8000/ping", "Backend API",
+                                         wait_timeout("Backend API", ready_times))
+        frontend_future = executor.submit(wait_for_service, "http://localhost:3000", "Frontend App",
+                                          wait_timeout("Frontend App", ready_times))
+        backend_time = backend_future.result()
+        frontend_time = frontend_future.result()
+    
+    backend_ready = backend_time is not None
+    frontend_ready = frontend_time is not None
+    
+    # Remember boot times (keeping the last good one on a timeout) to size the next wait
+    for name, elapsed in (("Backend API", backend_time), ("Frontend App", frontend_time)):
+        if elapsed is not None:
+            ready_times[name] = round(elapsed, 2)
     
     # Store current hashes for next run
-    current_hashes = get_change_detection()
-    store_hashes(current_hashes)
+    store_hashes({**current_hashes, "ready_times": ready_times})
     
     # Show status
-    show_service_status()
+    show_service_status({"Backend API": backend_ready, "Frontend App": frontend_ready})
     show_urls()
     
     if backend_ready and frontend_ready: